@@ -0,0 +1,74 @@
+import numpy as np
+from ortools.sat.python import cp_model
+
+# Cargo-to-vehicle assignment shared by the Gradio cargo pickup apps
+
+FAST_PATH = True  # Skip the solver when the answer is known from the input shape
+
+INVALID_CARGO_MESSAGE = "Cargo must be given in whole, non-negative units."
+CITY_TABLE_MESSAGE = "Please enter exactly one row per city."
+
+def city_columns(dataframe, num_cities):
+    """Returns the Cargo and Priority columns of the city table, or None if it does not have one row per city."""
+    # Rows are matched to the city names by position, so a missing or extra row would misalign them
+    if len(dataframe) != num_cities:
+        return None
+    return dataframe['Cargo'].tolist(), dataframe['Priority'].tolist()
+
+def whole_units(cargo):
+    """Returns the cargo amounts as ints, or None if any of them is negative or not a whole number."""
+    # CP-SAT only accepts integer coefficients; truncating would overload vehicles silently.
+    # An empty cell arrives as NaN, which is not a whole number either.
+    if not all(float(c).is_integer() for c in cargo):
+        return None
+    # Negative cargo would offset the total that the fast paths compare against a single vehicle
+    if any(c < 0 for c in cargo):
+        return None
+    return [int(c) for c in cargo]
+
+def solve_cp_sat(cargo, distances, vehicle_capacities):
+    """Solves the binary assignment exactly with CP-SAT; returns the 0/1 matrix or None if infeasible."""
+    num_vehicles = len(vehicle_capacities)
+    num_cities = len(cargo)
+    model = cp_model.CpModel()
+
+    # Decision variables
+    x = {(i, j): model.NewBoolVar(f"x_{i}_{j}") for i in range(num_vehicles) for j in range(num_cities)}
+
+    # Objective function: minimize total distance traveled by all vehicles
+    model.Minimize(sum(distances[j] * x[i, j] for i in range(num_vehicles) for j in range(num_cities)))
+
+    # Constraint: Each city with cargo must be picked up exactly once; cities without cargo are skipped
+    for j in range(num_cities):
+        model.Add(sum(x[i, j] for i in range(num_vehicles)) == (1 if cargo[j] > 0 else 0))
+
+    # Constraint: Respect vehicle capacities
+    for i in range(num_vehicles):
+        model.Add(sum(cargo[j] * x[i, j] for j in range(num_cities)) <= vehicle_capacities[i])
+
+    solver = cp_model.CpSolver()
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return np.array([[solver.Value(x[i, j]) for j in range(num_cities)] for i in range(num_vehicles)], dtype=np.int8)
+
+def assign(cargo, distances, vehicle_capacities):
+    """Assigns every city with cargo to one vehicle at minimum distance; returns the 0/1 matrix or None if infeasible."""
+    num_vehicles = len(vehicle_capacities)
+
+    # Distance does not depend on which vehicle collects a city, so if all cargo fits
+    # on the first vehicle that assignment is already optimal
+    if FAST_PATH and num_vehicles and sum(cargo) <= vehicle_capacities[0]:
+        sol = np.zeros((num_vehicles, len(cargo)), dtype=np.int8)
+        sol[0] = np.asarray(cargo) > 0
+        return sol
+    return solve_cp_sat(cargo, distances, vehicle_capacities)
+
+def vehicle_routes(sol, cargo, distances):
+    """Yields (vehicle, city indices, cargo collected, distance) for every vehicle the assignment uses."""
+    cargo_arr = np.asarray(cargo)
+    distance_arr = np.asarray(distances)
+    for i, row in enumerate(sol):
+        mask = row.astype(bool)
+        if mask.any():
+            yield i, np.flatnonzero(mask), int(cargo_arr[mask].sum()), int(distance_arr[mask].sum())
@@ -1,4 +1,4 @@
-import pulp
+from cargo_assignment import CITY_TABLE_MESSAGE, INVALID_CARGO_MESSAGE, assign, city_columns, vehicle_routes, whole_units
 import gradio as gr
 
 # Distance matrix from inland locations to Durban (in kilometers)
@@ -8,78 +8,59 @@ distances_to_durban = [568, 635, 569, 330, 392]  # Distances from Durban to each
 def optimize_pulp(cargo, priorities, vehicle_capacities):
     # Parse vehicle capacities
     vehicle_capacities = [int(c.strip()) for c in vehicle_capacities.split(',') if c.strip()]
-    num_vehicles = len(vehicle_capacities)
-    num_cities = len(city_names)
 
-    # Initialize the linear programming problem
-    prob = pulp.LpProblem("Inland_Cargo_Optimization", pulp.LpMinimize)
+    cargo = whole_units(cargo)
+    if cargo is None:
+        return INVALID_CARGO_MESSAGE
 
-    # Decision variables
-    x = pulp.LpVariable.dicts("x", [(i, j) for i in range(num_vehicles) for j in range(num_cities)], 
-                              lowBound=0, upBound=1, cat='Binary')
-
-    # Objective function: minimize total distance traveled by all vehicles
-    prob += pulp.lpSum(distances_to_durban[j] * x[i, j] for i in range(num_vehicles) for j in range(num_cities)), "Total_Distance"
-
-    # Constraint: Each city's cargo must be picked up exactly once by any one vehicle
-    for j in range(num_cities):
-        prob += pulp.lpSum(x[i, j] for i in range(num_vehicles)) == 1, f"City_{j}_Coverage"
-
-    # Constraint: Respect vehicle capacities
-    for i in range(num_vehicles):
-        prob += pulp.lpSum(cargo[j] * x[i, j] for j in range(num_cities)) <= vehicle_capacities[i], f"Capacity_Vehicle_{i}"
-    
-    # Ensure that the total picked up from each city does not exceed the available cargo
-    for j in range(num_cities):
-        prob += pulp.lpSum(x[i, j] * cargo[j] for i in range(num_vehicles)) == cargo[j], f"Cargo_Exact_Pickup_City_{j}"
-
-    # Solve the problem
-    prob.solve()
+    sol = assign(cargo, distances_to_durban, vehicle_capacities)
+    if sol is None:
+        return "No feasible assignment found. Please ensure the vehicle capacities can cover the cargo."
 
     # Retrieve the optimized routes
-    result = ""
+    result = []
     total_distance = 0
-    for i in range(num_vehicles):
-        vehicle_route = [city_names[j] for j in range(num_cities) if pulp.value(x[i, j]) == 1]
-        if vehicle_route:
-            vehicle_cargo = sum(cargo[j] for j in range(num_cities) if pulp.value(x[i, j]) == 1)
-            route_distance = sum(distances_to_durban[j] for j in range(num_cities) if pulp.value(x[i, j]) == 1)
-            result += f"Vehicle {i + 1} picks up cargo from {', '.join(vehicle_route)} and collects {vehicle_cargo} units.\n"
-            total_distance += route_distance
+    for i, cities, vehicle_cargo, route_distance in vehicle_routes(sol, cargo, distances_to_durban):
+        vehicle_route = [city_names[j] for j in cities]
+        result.append(f"Vehicle {i + 1} picks up cargo from {', '.join(vehicle_route)} and collects {vehicle_cargo} units.\n")
+        total_distance += route_distance
 
-    result += f"\nTotal distance traveled: {total_distance} km"
-    return result
+    result.append(f"\nTotal distance traveled: {total_distance} km")
+    return "".join(result)
 
-def gradio_pulp_interface(cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw,
-                          priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw, vehicle_capacities):
-    cargo = [cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw]
-    priorities = [priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw]
+def gradio_pulp_interface(dataframe, vehicle_capacities):
+    columns = city_columns(dataframe, len(city_names))
+    if columns is None:
+        return CITY_TABLE_MESSAGE
+    cargo, priorities = columns
     return optimize_pulp(cargo, priorities, vehicle_capacities)
 
 with gr.Blocks() as demo_pulp:
-    gr.Markdown("# Inland Cargo Pickup Optimization for Durban Port using PuLP with Vehicle Constraints")
+    gr.Markdown("# Inland Cargo Pickup Optimization for Durban Port using OR-Tools CP-SAT with Vehicle Constraints")
     
     with gr.Row():
         with gr.Column():
-            cargo_jhb = gr.Number(label="Cargo at Johannesburg", value=2)
-            cargo_pta = gr.Number(label="Cargo at Pretoria", value=1)
-            cargo_blm = gr.Number(label="Cargo at Bloemfontein", value=3)
-            cargo_nlp = gr.Number(label="Cargo at Nelspruit", value=2)
-            cargo_plw = gr.Number(label="Cargo at Polokwane", value=6)
+            city_data = gr.Dataframe(
+                headers=["City", "Cargo", "Priority"],
+                value=[
+                    ["Johannesburg", 2, 2],
+                    ["Pretoria", 1, 1],
+                    ["Bloemfontein", 3, 3],
+                    ["Nelspruit", 2, 2],
+                    ["Polokwane", 6, 1]
+                ],
+                datatype=["str", "number", "number"],
+                row_count=(5, "fixed"),
+                col_count=(3, "fixed"),
+                interactive=True
+            )
         
         with gr.Column():
-            priority_jhb = gr.Number(label="Priority of Johannesburg", value=2)
-            priority_pta = gr.Number(label="Priority of Pretoria", value=1)
-            priority_blm = gr.Number(label="Priority of Bloemfontein", value=3)
-            priority_nlp = gr.Number(label="Priority of Nelspruit", value=2)
-            priority_plw = gr.Number(label="Priority of Polokwane", value=1)
             vehicle_capacities = gr.Textbox(label="Vehicle Capacities (comma-separated)", value="5,5,5,3,8")
     
     output_pulp = gr.Textbox(label="Optimized Route")
-    run_button_pulp = gr.Button("Optimize Route using PuLP")
+    run_button_pulp = gr.Button("Optimize Route using CP-SAT")
     
-    run_button_pulp.click(gradio_pulp_interface, inputs=[cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw,
-                                                        priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw,
-                                                        vehicle_capacities], outputs=output_pulp)
+    run_button_pulp.click(gradio_pulp_interface, inputs=[city_data, vehicle_capacities], outputs=output_pulp)
 
 demo_pulp.launch()
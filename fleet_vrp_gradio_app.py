@@ -1,5 +1,5 @@
-import random
 import numpy as np
+from cargo_assignment import CITY_TABLE_MESSAGE, INVALID_CARGO_MESSAGE, assign, city_columns, whole_units
 from deap import base, creator, tools, algorithms
 import gradio as gr
 
@@ -12,56 +12,59 @@ distances_to_durban = [
     [317, 438, 460, 0, 350],  # Nelspruit
     [320, 340, 300, 350, 0],  # Polokwane
 ]
+distance_matrix = np.array(distances_to_durban, dtype=np.int32)
 
 # Setting up the genetic algorithm problem
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))  # We want to minimize the distance
 creator.create("Individual", list, fitness=creator.FitnessMin)
 
-toolbox = base.Toolbox()
-toolbox.register("indices", random.sample, range(len(city_names)), len(city_names))
-toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.indices)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-# Evaluation function for the genetic algorithm considering vehicle capacity constraints
-def evaluate(individual, cargo, vehicle_capacities):
-    total_distance = 0
-    vehicle_loads = [0] * len(vehicle_capacities)  # Keeps track of cargo loads per vehicle
-    vehicle_distances = [0] * len(vehicle_capacities)  # Keeps track of distances traveled
-    current_vehicle = 0  # Start with the first vehicle
+# Build the whole initial population at once: argsort of random keys gives uniform permutations
+def make_population(n):
+    keys = np.random.random((n, len(city_names)))
+    perms = np.argsort(keys, axis=1)
+    return [creator.Individual(p.tolist()) for p in perms]
 
-    # Calculate the route and cargo distribution for each vehicle
-    for idx in individual:
-        cargo_at_location = cargo[idx]
-        
-        # Check if current vehicle can handle more cargo; if not, switch to next vehicle
-        if vehicle_loads[current_vehicle] + cargo_at_location <= vehicle_capacities[current_vehicle]:
-            vehicle_loads[current_vehicle] += cargo_at_location
-            # Calculate distance for the current trip
-            if vehicle_distances[current_vehicle] == 0:
-                vehicle_distances[current_vehicle] += distances_to_durban[0][idx]  # Initial pickup from Durban
-            else:
-                vehicle_distances[current_vehicle] += distances_to_durban[0][idx]
-        else:
-            # Switch to the next vehicle if available
-            current_vehicle += 1
-            if current_vehicle >= len(vehicle_capacities):
-                break  # No more vehicles available, stop the evaluation
-            # Start the route for the next vehicle
-            vehicle_loads[current_vehicle] += cargo_at_location
-            vehicle_distances[current_vehicle] += distances_to_durban[0][idx]
-    
-    # Sum up the distances traveled by all vehicles
-    total_distance = sum(vehicle_distances)
-    
-    # Apply a heavy penalty if any vehicle exceeded its capacity to prevent invalid solutions
-    penalty = 10000 * sum(1 for load, capacity in zip(vehicle_loads, vehicle_capacities) if load > capacity)
-    
-    return total_distance + penalty,
+toolbox = base.Toolbox()
+toolbox.register("population", make_population)
+
+# Evaluation function for the genetic algorithm considering vehicle capacity constraints:
+# scores the whole population at once, walking the route positions and updating every individual in lockstep
+def evaluate_population(population, cargo, vehicle_capacities):
+    routes = np.asarray(population, dtype=np.int32)
+    num_individuals, num_stops = routes.shape
+    num_vehicles = vehicle_capacities.shape[0]
+    rows = np.arange(num_individuals)
+
+    route_cargo = cargo[routes]
+    # Cities without cargo are skipped, as in the CP-SAT model: no trip and no distance
+    route_distances = np.where(route_cargo > 0, distance_matrix[0, routes], 0)
+    vehicle_loads = np.zeros((num_individuals, num_vehicles))
+    current_vehicle = np.zeros(num_individuals, dtype=np.int64)
+    active = np.ones(num_individuals, dtype=bool)  # False once an individual runs out of vehicles
+    total_distance = np.zeros(num_individuals, dtype=np.int64)
+
+    for stop in range(num_stops):
+        cargo_at_location = route_cargo[:, stop]
+
+        # Switch to the next vehicle wherever the current one cannot take this stop's cargo
+        vehicle = np.minimum(current_vehicle, num_vehicles - 1)
+        fits = (vehicle_loads[rows, vehicle] + cargo_at_location <= vehicle_capacities[vehicle]) | (cargo_at_location == 0)
+        current_vehicle += active & ~fits
+        active &= current_vehicle < num_vehicles
+
+        vehicle = np.minimum(current_vehicle, num_vehicles - 1)
+        vehicle_loads[rows[active], vehicle[active]] += cargo_at_location[active]
+        total_distance += np.where(active, route_distances[:, stop], 0)
+
+    # Apply a heavy penalty for every vehicle that exceeded its capacity
+    penalty = 10000 * np.sum(vehicle_loads > vehicle_capacities, axis=1)
+
+    return total_distance + penalty
 
 toolbox.register("mate", tools.cxOrdered)
 toolbox.register("mutate", tools.mutShuffleIndexes, indpb=0.05)
 toolbox.register("select", tools.selTournament, tournsize=3)
-toolbox.register("evaluate", evaluate)
+toolbox.register("evaluate_population", evaluate_population)
 
 # Genetic Algorithm parameters
 population_size = 50
@@ -69,51 +72,102 @@ num_generations = 40
 crossover_probability = 0.7
 mutation_probability = 0.2
 
-def optimize_routes(cargo, priorities, vehicle_capacities):
-    # Parse vehicle capacities
-    vehicle_capacities = [int(c.strip()) for c in vehicle_capacities.split(',') if c.strip()]
-    
+USE_CP_SAT = True  # Solve small instances exactly with cargo_assignment.assign instead of the GA
+GA_FAST_PATH = True  # Skip the GA when all cargo fits on the first vehicle; CP-SAT instances use cargo_assignment.FAST_PATH
+CP_SAT_MAX_CITIES = 20  # Above this the GA is used as the scalable fallback
+
+def optimize_cp_sat(cargo, priorities, vehicle_capacities):
+    """Solves the vehicle/city assignment exactly with the shared assign() and formats it like the GA results."""
+    num_vehicles = len(vehicle_capacities)
+    num_cities = len(city_names)
+
+    sol = assign(cargo, distances_to_durban[0], vehicle_capacities)
+    if sol is None:
+        return "No feasible assignment found. Please ensure the vehicle capacities can cover the cargo."
+
+    # Display the results, separating vehicles with a blank line as the GA output does
+    result = []
+    total_distance = 0
+    for i in range(num_vehicles):
+        separator = "\n" if result else ""
+        for j in range(num_cities):
+            if sol[i, j]:
+                result.append(f"{separator}Vehicle {i + 1} picks up cargo from {city_names[j]} with priority {priorities[j]} and collects {cargo[j]} units.\n")
+                separator = ""
+                total_distance += distances_to_durban[0][j]
+
+    result.append(f"\nTotal distance traveled: {total_distance} km")
+    return "".join(result)
+
+def run_genetic_algorithm(cargo_arr, capacity_arr):
     # Create an initial population
     population = toolbox.population(n=population_size)
 
     # Run the genetic algorithm
     for generation in range(num_generations):
         offspring = algorithms.varAnd(population, toolbox, cxpb=crossover_probability, mutpb=mutation_probability)
-        fits = list(map(lambda ind: toolbox.evaluate(ind, cargo, vehicle_capacities), offspring))
-        for fit, ind in zip(fits, offspring):
-            ind.fitness.values = fit
+        # varAnd only invalidates crossed/mutated individuals; the rest keep their parents' fitness
+        invalid = [ind for ind in offspring if not ind.fitness.valid]
+        if invalid:
+            fits = toolbox.evaluate_population(invalid, cargo_arr, capacity_arr)
+            for fit, ind in zip(fits, invalid):
+                ind.fitness.values = (fit,)
 
         population = toolbox.select(offspring, k=len(population))
 
     # Get the best solution found
-    best_individual = tools.selBest(population, 1)[0]
+    return tools.selBest(population, 1)[0]
+
+def optimize_routes(cargo, priorities, vehicle_capacities):
+    # Parse vehicle capacities
+    vehicle_capacities = [int(c.strip()) for c in vehicle_capacities.split(',') if c.strip()]
+    if not vehicle_capacities:
+        return "Please provide at least one vehicle capacity."
+
+    cargo = whole_units(cargo)
+    if cargo is None:
+        return INVALID_CARGO_MESSAGE
+
+    if USE_CP_SAT and len(city_names) <= CP_SAT_MAX_CITIES:
+        return optimize_cp_sat(cargo, priorities, vehicle_capacities)
+
+    # If all cargo fits on the first vehicle, every visiting order has the same fitness
+    if GA_FAST_PATH and sum(cargo) <= vehicle_capacities[0]:
+        best_individual = [idx for idx in range(len(city_names)) if cargo[idx] > 0]
+    else:
+        cargo_arr = np.asarray(cargo, dtype=np.float64)
+        capacity_arr = np.asarray(vehicle_capacities, dtype=np.float64)
+        best_individual = run_genetic_algorithm(cargo_arr, capacity_arr)
 
     # Display the results
-    result = ""
+    result = []
     current_vehicle = 0
     vehicle_load = 0
     total_distance = 0
 
     for idx in best_individual:
         cargo_picked = cargo[idx]
+        if cargo_picked == 0:
+            continue  # Nothing to collect, so no vehicle is sent
         if vehicle_load + cargo_picked <= vehicle_capacities[current_vehicle]:
             vehicle_load += cargo_picked
-            result += f"Vehicle {current_vehicle + 1} picks up cargo from {city_names[idx]} with priority {priorities[idx]} and collects {cargo_picked} units.\n"
+            result.append(f"Vehicle {current_vehicle + 1} picks up cargo from {city_names[idx]} with priority {priorities[idx]} and collects {cargo_picked} units.\n")
         else:
             current_vehicle += 1
             if current_vehicle >= len(vehicle_capacities):
                 break
             vehicle_load = cargo_picked
-            result += f"\nVehicle {current_vehicle + 1} picks up cargo from {city_names[idx]} with priority {priorities[idx]} and collects {cargo_picked} units.\n"
+            result.append(f"\nVehicle {current_vehicle + 1} picks up cargo from {city_names[idx]} with priority {priorities[idx]} and collects {cargo_picked} units.\n")
         total_distance += distances_to_durban[0][idx]
 
-    result += f"\nTotal distance traveled: {total_distance} km"
-    return result
+    result.append(f"\nTotal distance traveled: {total_distance} km")
+    return "".join(result)
 
-def gradio_interface(cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw,
-                     priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw, vehicle_capacities):
-    cargo = [cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw]
-    priorities = [priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw]
+def gradio_interface(dataframe, vehicle_capacities):
+    columns = city_columns(dataframe, len(city_names))
+    if columns is None:
+        return CITY_TABLE_MESSAGE
+    cargo, priorities = columns
     return optimize_routes(cargo, priorities, vehicle_capacities)
 
 with gr.Blocks() as demo:
@@ -121,25 +175,27 @@ with gr.Blocks() as demo:
     
     with gr.Row():
         with gr.Column():
-            cargo_jhb = gr.Number(label="Cargo at Johannesburg", value=2)
-            cargo_pta = gr.Number(label="Cargo at Pretoria", value=1)
-            cargo_blm = gr.Number(label="Cargo at Bloemfontein", value=3)
-            cargo_nlp = gr.Number(label="Cargo at Nelspruit", value=2)
-            cargo_plw = gr.Number(label="Cargo at Polokwane", value=2)
+            city_data = gr.Dataframe(
+                headers=["City", "Cargo", "Priority"],
+                value=[
+                    ["Johannesburg", 2, 2],
+                    ["Pretoria", 1, 1],
+                    ["Bloemfontein", 3, 3],
+                    ["Nelspruit", 2, 2],
+                    ["Polokwane", 2, 1]
+                ],
+                datatype=["str", "number", "number"],
+                row_count=(5, "fixed"),
+                col_count=(3, "fixed"),
+                interactive=True
+            )
         
         with gr.Column():
-            priority_jhb = gr.Number(label="Priority of Johannesburg", value=2)
-            priority_pta = gr.Number(label="Priority of Pretoria", value=1)
-            priority_blm = gr.Number(label="Priority of Bloemfontein", value=3)
-            priority_nlp = gr.Number(label="Priority of Nelspruit", value=2)
-            priority_plw = gr.Number(label="Priority of Polokwane", value=1)
             vehicle_capacities = gr.Textbox(label="Vehicle Capacities (comma-separated)", value="5,5,5")
     
     output = gr.Textbox(label="Optimized Route")
     run_button = gr.Button("Optimize Route")
     
-    run_button.click(gradio_interface, inputs=[cargo_jhb, cargo_pta, cargo_blm, cargo_nlp, cargo_plw,
-                                               priority_jhb, priority_pta, priority_blm, priority_nlp, priority_plw,
-                                               vehicle_capacities], outputs=output)
+    run_button.click(gradio_interface, inputs=[city_data, vehicle_capacities], outputs=output)
 
 demo.launch()
@@ -2,7 +2,10 @@
 
 import streamlit as st
 import networkx as nx
+import numpy as np
 import plotly.graph_objects as go
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 
 # Define the ports and routes
 ports = [
@@ -50,15 +53,30 @@ routes = [
 # Add edges with distances
 G.add_weighted_edges_from(routes)
 
+port_index = {port: i for i, port in enumerate(ports)}
+
+# Streamlit re-runs the script on every interaction, so keep the precompute in the
+# resource cache: every shortest path is computed once per server process with SciPy's Dijkstra
+@st.cache_resource
+def all_shortest_paths():
+    adjacency = np.zeros((len(ports), len(ports)))
+    for u, v, distance in routes:
+        adjacency[port_index[u], port_index[v]] = distance
+    return dijkstra(csr_matrix(adjacency), directed=False, return_predecessors=True)
+
 # Function to find the shortest route
 def find_shortest_route(G, start_port, end_port):
-    try:
-        shortest_distance = nx.dijkstra_path_length(G, start_port, end_port, weight='weight')
-        shortest_path = nx.dijkstra_path(G, start_port, end_port, weight='weight')
-        return shortest_distance, shortest_path
-    except nx.NetworkXNoPath:
+    shortest_distances, predecessors = all_shortest_paths()
+    start, end = port_index[start_port], port_index[end_port]
+    if np.isinf(shortest_distances[start, end]):
         return None, None
 
+    # Walk the predecessor row back from the destination to the start
+    path = [end]
+    while path[-1] != start:
+        path.append(predecessors[start, path[-1]])
+    return int(shortest_distances[start, end]), [ports[i] for i in reversed(path)]
+
 # Streamlit App
 def main():
     st.title("South African Ports Route Optimization")
@@ -85,13 +103,18 @@ def main():
             st.error(f"No available route from {start_port} to {end_port}.")
 
 def visualize_route(G, path):
+    st.plotly_chart(build_route_figure(G, tuple(path)), use_container_width=True)
+
+# The layout and base edges never change, so compute them once per server process
+@st.cache_resource
+def base_layout(_G):
     # Generate positions for the nodes using a layout algorithm
-    pos = nx.spring_layout(G, seed=42)  # Seed for reproducibility
+    pos = nx.spring_layout(_G, seed=42)  # Seed for reproducibility
 
     # Create edge traces
     edge_x = []
     edge_y = []
-    for edge in G.edges():
+    for edge in _G.edges():
         x0, y0 = pos[edge[0]]
         x1, y1 = pos[edge[1]]
         edge_x.extend([x0, x1, None])
@@ -103,6 +126,13 @@ def visualize_route(G, path):
         hoverinfo='none',
         mode='lines')
 
+    return pos, edge_trace
+
+# Cached per path; the leading underscore tells Streamlit not to hash the graph
+@st.cache_data
+def build_route_figure(_G, path):
+    pos, edge_trace = base_layout(_G)
+
     # Highlight the shortest path
     if path:
         path_edges = list(zip(path, path[1:]))
@@ -127,7 +157,7 @@ def visualize_route(G, path):
     node_y = []
     node_text = []
     node_color = []
-    for node in G.nodes():
+    for node in _G.nodes():
         x, y = pos[node]
         node_x.append(x)
         node_y.append(y)
@@ -160,7 +190,7 @@ def visualize_route(G, path):
                         yaxis=dict(showgrid=False, zeroline=False, showticklabels=False))
                     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 if __name__ == "__main__":
     main()
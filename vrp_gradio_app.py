@@ -1,119 +1,308 @@
 # Import necessary libraries
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+import threading
 import gradio as gr
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 
 # List of city names
-city_names = ['Durban', 'Johannesburg', 'Pretoria', 'Cape Town', 'Bloemfontein']
+city_names = ('Durban', 'Johannesburg', 'Pretoria', 'Cape Town', 'Bloemfontein')
+
+# Fixed instance: only demands and capacity change between requests.
+# The int64 array is the single source for NUM_NODES and the plain-int forms below that requests
+# and solver workers actually use; it stays an array for any later vectorized checks.
+DISTANCE_MATRIX = np.array([
+    [0, 568, 634, 569, 392],  # Durban
+    [568, 0, 121, 595, 100],  # Johannesburg
+    [634, 121, 0, 712, 216],  # Pretoria
+    [569, 595, 712, 0, 497],  # Cape Town
+    [392, 100, 216, 497, 0],  # Bloemfontein
+], dtype=np.int64)
+DISTANCE_MATRIX.setflags(write=False)  # Freeze it so the derived forms below cannot drift from it
+# Nested lists for the OR-Tools binding, which does not accept NumPy arrays; converted once at load time
+DISTANCE_ROWS = DISTANCE_MATRIX.tolist()
+NUM_NODES = len(DISTANCE_MATRIX)
+# Flat row-major copy of plain ints for Python-side lookups: DISTANCES[from_node * NUM_NODES + to_node]
+DISTANCES = tuple(DISTANCE_MATRIX.ravel().tolist())
+NUM_VEHICLES = 1
+# Capacity is enforced only by the total-demand check in solve_vrp_cached, which is exact for
+# a single vehicle; more vehicles would need the Capacity dimension back in build_routing_model.
+if NUM_VEHICLES != 1:
+    raise ValueError('the routing model has no Capacity dimension, so NUM_VEHICLES must be 1')
+DEPOT = 0  # Starting at Durban
+
+# Solve single-vehicle instances that fit in the vehicle by enumeration instead of OR-Tools
+FAST_PATH = True
+# Largest instance enumerated on the fast path: (n - 1)! tours, 24 for 5 nodes
+BRUTE_FORCE_MAX_NODES = 8
+
+# Solves the Gradio queue runs at once; each one races the whole portfolio in the worker pool
+QUEUE_CONCURRENCY_LIMIT = 8
+
+# Metaheuristics raced against each other, one process each; the cheapest result wins
+METAHEURISTIC_PORTFOLIO = [
+    routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+    routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH,
+    routing_enums_pb2.LocalSearchMetaheuristic.SIMULATED_ANNEALING,
+    routing_enums_pb2.LocalSearchMetaheuristic.GENERIC_TABU_SEARCH,
+]
 
 def print_solution(manager, routing, solution):
     """Formats the solution into a string."""
-    output = ''
-    # Objective value.
-    output += 'Objective: {} kilometers\n'.format(solution.ObjectiveValue())
+    # Bind the methods used in the route walk once instead of looking them up per stop.
+    next_var = routing.NextVar
+    value = solution.Value
+    index_to_node = manager.IndexToNode
+    is_end = routing.IsEnd
+
+    # Read the route out of the assignment as a node list; the Python bindings have no
+    # bulk route accessor, so this walk is the only part that crosses into C++.
     index = routing.Start(0)
-    plan_output = 'Route for vehicle 0:\n'
-    route_distance = 0
-    while not routing.IsEnd(index):
-        plan_output += ' {} ->'.format(city_names[manager.IndexToNode(index)])
-        previous_index = index
-        index = solution.Value(routing.NextVar(index))
-        route_distance += routing.GetArcCostForVehicle(previous_index, index, 0)
-    plan_output += ' {}\n'.format(city_names[manager.IndexToNode(index)])
-    output += plan_output
-    output += 'Route distance: {} kilometers\n'.format(route_distance)
-    return output
+    depot_node = index_to_node(index)
+    route = [depot_node]
+    index = value(next_var(index))
+    while not is_end(index):
+        route.append(index_to_node(index))
+        index = value(next_var(index))
+    # The route ends back at the depot it started from, so its node is already known.
+    route.append(depot_node)
+
+    # Arc costs are the distance matrix, so the route distance needs no further solver calls.
+    route_distance = sum(DISTANCES[a * NUM_NODES + b] for a, b in zip(route, route[1:]))
+    return format_tour(route, route_distance, solution.ObjectiveValue())
+
+def format_tour(tour, route_distance, objective=None):
+    """Formats a depot-to-depot tour in the same layout as print_solution."""
+    if objective is None:
+        objective = route_distance
+    return ''.join([
+        f'Objective: {objective} kilometers\n',
+        'Route for vehicle 0:\n',
+        ' ->'.join(f' {city_names[node]}' for node in tour) + '\n',
+        f'Route distance: {route_distance} kilometers\n',
+    ])
+
+def solve_tsp_brute_force(depot):
+    """Returns the shortest depot-to-depot tour through every city and its length."""
+    cities = tuple(node for node in range(NUM_NODES) if node != depot)
+    best_distance, best_tour = min(
+        (sum(DISTANCES[a * NUM_NODES + b] for a, b in zip(tour, tour[1:])), tour)
+        for tour in ((depot, *order, depot) for order in itertools.permutations(cities)))
+    return best_tour, best_distance
+
+def build_initial_routes(data):
+    """Greedily fills each vehicle with its nearest unvisited cities that still fit."""
+    demands = data['demands']
+    unvisited = [node for node in range(NUM_NODES) if node != data['depot']]
+    routes = []
+    for capacity in data['vehicle_capacities']:
+        route = []
+        load = 0
+        current = data['depot']
+        while True:
+            candidates = [node for node in unvisited if load + demands[node] <= capacity]
+            if not candidates:
+                break
+            current = min(candidates, key=lambda node: DISTANCES[current * NUM_NODES + node])
+            route.append(current)
+            load += demands[current]
+            unvisited.remove(current)
+        routes.append(route)
+    return routes
+
+def build_routing_model():
+    """Builds the routing model for the fixed distance matrix and fleet."""
+    # Create the routing index manager.
+    manager = pywrapcp.RoutingIndexManager(NUM_NODES, NUM_VEHICLES, DEPOT)
+
+    # Create Routing Model, caching every arc cost and sharing one cost class across vehicles.
+    model_parameters = pywrapcp.DefaultRoutingModelParameters()
+    model_parameters.max_callback_cache_size = 1024
+    model_parameters.reduce_vehicle_cost_model = True
+    routing = pywrapcp.RoutingModel(manager, model_parameters)
+
+    # Register the distance matrix so arc costs are evaluated in C++.
+    transit_callback_index = routing.RegisterTransitMatrix(DISTANCE_ROWS)
+
+    # Define cost of each arc.
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    # No Capacity dimension: transit values are cached at registration and cumul bounds can
+    # only shrink once the model is closed, so neither could follow per-request inputs.
+    # With one vehicle that must visit every city, the dimension would only enforce that the
+    # total demand fits, which solve_vrp_cached checks before solving.
+    return manager, routing
+
+# Built once per solver worker by init_solver_worker and re-solved on every request;
+# the main process never builds or searches a model.
+routing_manager, routing_model = None, None
+
+def init_solver_worker():
+    """Builds this worker's routing model when the pool starts the process."""
+    global routing_manager, routing_model
+    routing_manager, routing_model = build_routing_model()
+
+def build_search_parameters(metaheuristic):
+    """Builds the search parameters used with one metaheuristic of the portfolio."""
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION)
+    search_parameters.local_search_metaheuristic = metaheuristic
+    search_parameters.time_limit.seconds = 1
+    search_parameters.solution_limit = 100
+    return search_parameters
+
+# Built once at import rather than re-created for every solve.
+search_parameters_by_metaheuristic = {metaheuristic: build_search_parameters(metaheuristic)
+                                      for metaheuristic in METAHEURISTIC_PORTFOLIO}
+
+def build_solver_pool():
+    """Creates the pool of solver processes, each holding its own copy of the routing model."""
+    # Spawned rather than forked: workers start lazily from a request thread while the server runs,
+    # and forking a multi-threaded process can deadlock. Every spawned worker re-imports this module,
+    # gradio included, so the pool is capped at what the queue can use rather than the core count.
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(METAHEURISTIC_PORTFOLIO) * QUEUE_CONCURRENCY_LIMIT,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_solver_worker)
+
+# One pool shared by all requests, so concurrent requests search on separate cores instead of
+# contending for the GIL. A worker runs one solve at a time, so its model needs no lock.
+# Workers are started on first use, so importing this module in a worker does not spawn more.
+# With FAST_PATH on and NUM_NODES <= BRUTE_FORCE_MAX_NODES, as shipped, feasible inputs are answered
+# from fast_path_solution and never reach the pool; set FAST_PATH = False to exercise it.
+solver_pool = build_solver_pool()
+solver_pool_lock = threading.Lock()
+
+def replace_solver_pool(broken_pool):
+    """Swaps a pool whose worker died for a new one, unless another request already did."""
+    global solver_pool
+    with solver_pool_lock:
+        if solver_pool is broken_pool:
+            broken_pool.shutdown(wait=False)
+            solver_pool = build_solver_pool()
+
+def solve_with_metaheuristic(data, metaheuristic):
+    """Solves the VRP with one local search metaheuristic; returns (objective, formatted solution) or None."""
+    search_parameters = search_parameters_by_metaheuristic[metaheuristic]
+    initial_routes = [[routing_manager.NodeToIndex(node) for node in route]
+                      for route in build_initial_routes(data)]
+
+    # Warm-start from the greedy routes; fall back to a cold solve if they are infeasible.
+    initial_solution = routing_model.ReadAssignmentFromRoutes(initial_routes, True)
+
+    # Solve the problem.
+    if initial_solution:
+        solution = routing_model.SolveFromAssignmentWithParameters(initial_solution, search_parameters)
+    else:
+        solution = routing_model.SolveWithParameters(search_parameters)
+
+    if solution:
+        return solution.ObjectiveValue(), print_solution(routing_manager, routing_model, solution)
+    return None
+
+def run_portfolio(pool, data):
+    """Races every metaheuristic in the portfolio on the pool; returns the (objective, solution) pairs found."""
+    return [result for result in pool.map(solve_with_metaheuristic,
+                                          itertools.repeat(data),
+                                          METAHEURISTIC_PORTFOLIO)
+            if result]
+
+# With the capacity constraint inactive, every feasible single-vehicle input has the same optimal
+# tour, so the fast-path answer is enumerated once at import rather than per request or per scenario.
+# Larger instances are left to OR-Tools.
+fast_path_solution = (format_tour(*solve_tsp_brute_force(DEPOT))
+                      if NUM_NODES <= BRUTE_FORCE_MAX_NODES else None)
+
+@functools.lru_cache(maxsize=1024)
+def solve_vrp_cached(demand_durban, demand_johannesburg, demand_pretoria, demand_cape_town, demand_bloemfontein, vehicle_capacity):
+    """Solves the VRP for integer inputs; repeated inputs are answered from the cache."""
+    # Prepare data
+    data = {}
+    data['demands'] = np.array([demand_durban, demand_johannesburg, demand_pretoria,
+                                demand_cape_town, demand_bloemfontein], dtype=np.int64)
+    data['vehicle_capacities'] = [vehicle_capacity]
+    data['num_vehicles'] = NUM_VEHICLES
+    data['depot'] = DEPOT
+
+    # A single vehicle has to carry every demand; reject overloads before touching a solver.
+    # This also stands in for the Capacity dimension the shared routing model leaves out.
+    demands = data['demands']
+    if demands.max() > vehicle_capacity:
+        return f'Infeasible: the demand at {city_names[int(demands.argmax())]} alone exceeds the vehicle capacity.'
+    if demands.sum() > vehicle_capacity:
+        return 'No solution found. Please ensure the total demands do not exceed the vehicle capacity.'
+
+    # Once the demands fit, the capacity constraint is inactive and the problem is
+    # the fixed TSP over 4 cities solved at import.
+    if FAST_PATH and data['num_vehicles'] == 1 and fast_path_solution is not None:
+        return fast_path_solution
+
+    # Run the portfolio in parallel and keep the cheapest solution found.
+    # A dead worker breaks the whole pool for every later request, so replace it and retry once;
+    # a second failure reaches the handler in solve_vrp.
+    pool = solver_pool
+    try:
+        results = run_portfolio(pool, data)
+    except concurrent.futures.process.BrokenProcessPool:
+        replace_solver_pool(pool)
+        results = run_portfolio(solver_pool, data)
+
+    # Process and return solution.
+    if results:
+        return min(results, key=lambda result: result[0])[1]
+    else:
+        return 'No solution found. Please ensure the total demands do not exceed the vehicle capacity.'
 
 def solve_vrp(demand_durban, demand_johannesburg, demand_pretoria, demand_cape_town, demand_bloemfontein, vehicle_capacity):
     """Solves the VRP and returns the solution as a string."""
+    # The inputs arrive as ints (precision=0), so equal inputs share a cache entry
+    key = (demand_durban, demand_johannesburg, demand_pretoria,
+           demand_cape_town, demand_bloemfontein, vehicle_capacity)
+    # A cleared box arrives as None
+    if any(value is None for value in key):
+        return 'Please enter every demand and the vehicle capacity.'
+    if any(value < 0 for value in key):
+        return 'Demands and vehicle capacity cannot be negative.'
+    # Solver errors, including a pool that breaks again after being replaced, are caught here,
+    # outside the cache, so a transient failure is not served again for the same inputs
     try:
-        # Convert inputs to integers
-        demand_durban = int(demand_durban)
-        demand_johannesburg = int(demand_johannesburg)
-        demand_pretoria = int(demand_pretoria)
-        demand_cape_town = int(demand_cape_town)
-        demand_bloemfontein = int(demand_bloemfontein)
-        vehicle_capacity = int(vehicle_capacity)
-        
-        # Prepare data
-        data = {}
-        data['distance_matrix'] = [
-            [0, 568, 634, 569, 392],  # Durban
-            [568, 0, 121, 595, 100],  # Johannesburg
-            [634, 121, 0, 712, 216],  # Pretoria
-            [569, 595, 712, 0, 497],  # Cape Town
-            [392, 100, 216, 497, 0],  # Bloemfontein
-        ]
-        data['demands'] = [demand_durban, demand_johannesburg, demand_pretoria, demand_cape_town, demand_bloemfontein]
-        data['vehicle_capacities'] = [vehicle_capacity]
-        data['num_vehicles'] = 1
-        data['depot'] = 0  # Starting at Durban
-
-        # Create the routing index manager.
-        manager = pywrapcp.RoutingIndexManager(len(data['distance_matrix']),
-                                               data['num_vehicles'], data['depot'])
-
-        # Create Routing Model.
-        routing = pywrapcp.RoutingModel(manager)
-
-        # Create and register a transit callback.
-        def distance_callback(from_index, to_index):
-            """Returns the distance between the two nodes."""
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return data['distance_matrix'][from_node][to_node]
-
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-        # Define cost of each arc.
-        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-        # Add Capacity constraint.
-        def demand_callback(from_index):
-            """Returns the demand of the node."""
-            from_node = manager.IndexToNode(from_index)
-            return data['demands'][from_node]
-
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
-        routing.AddDimensionWithVehicleCapacity(
-            demand_callback_index,
-            0,  # null capacity slack
-            data['vehicle_capacities'],  # vehicle maximum capacities
-            True,  # start cumul to zero
-            'Capacity')
-
-        # Set up search parameters.
-        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        search_parameters.first_solution_strategy = (
-            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-
-        # Solve the problem.
-        solution = routing.SolveWithParameters(search_parameters)
-
-        # Process and return solution.
-        if solution:
-            return print_solution(manager, routing, solution)
-        else:
-            return 'No solution found. Please ensure the total demands do not exceed the vehicle capacity.'
+        return solve_vrp_cached(*key)
     except Exception as e:
         return f'An error occurred: {e}'
 
-# Gradio app
-with gr.Blocks() as demo:
-    gr.Markdown("# Vehicle Routing Problem Demo")
-    gr.Markdown("Enter the demands at each city and vehicle capacity:")
-    demand_durban = gr.Number(value=0, label='Demand at Durban (Depot)')
-    demand_johannesburg = gr.Number(value=1, label='Demand at Johannesburg')
-    demand_pretoria = gr.Number(value=1, label='Demand at Pretoria')
-    demand_cape_town = gr.Number(value=2, label='Demand at Cape Town')
-    demand_bloemfontein = gr.Number(value=4, label='Demand at Bloemfontein')
-    vehicle_capacity = gr.Number(value=5, label='Vehicle Capacity')
-    output = gr.Textbox(label='Solution')
-
-    btn = gr.Button("Solve VRP")
-
-    btn.click(solve_vrp, inputs=[demand_durban, demand_johannesburg, demand_pretoria,
-                                 demand_cape_town, demand_bloemfontein, vehicle_capacity],
-              outputs=output)
-
-demo.launch()
+def build_interface():
+    """Builds the Gradio app; a fixed-shape numeric form maps directly onto gr.Interface, exposed at /api/solve."""
+    return gr.Interface(
+        fn=solve_vrp,
+        inputs=[
+            gr.Number(value=0, label='Demand at Durban (Depot)', precision=0),
+            gr.Number(value=1, label='Demand at Johannesburg', precision=0),
+            gr.Number(value=1, label='Demand at Pretoria', precision=0),
+            gr.Number(value=2, label='Demand at Cape Town', precision=0),
+            gr.Number(value=4, label='Demand at Bloemfontein', precision=0),
+            gr.Number(value=5, label='Vehicle Capacity', precision=0),
+        ],
+        outputs=gr.Textbox(label='Solution'),
+        title="Vehicle Routing Problem Demo",
+        description="Enter the demands at each city and vehicle capacity:",
+        submit_btn="Solve VRP",
+        # The form is cheap to re-enter, so no Clear button; flagging would write CSVs to ./flagged/
+        # (allow_flagging is flagging_mode on Gradio 5)
+        clear_btn=None,
+        allow_flagging="never",
+        api_name='solve',
+    )
+
+# Built at module scope so the `gradio vrp_gradio_app.py` reload runner can find it; building it
+# starts no server, so solver workers importing this module only pay for the construction.
+demo = build_interface()
+
+# Only the launch is guarded, so solver worker processes importing this module never start a server
+if __name__ == '__main__':
+    # Queue requests and let several solves run at once instead of one at a time
+    demo.queue(default_concurrency_limit=QUEUE_CONCURRENCY_LIMIT).launch()